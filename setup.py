@@ -18,7 +18,12 @@ setuptools.setup(
         "Programming Language :: Python :: 3.10",
         "Operating System :: OS Independent",
     ],
-    entry_points={"console_scripts": ["spellsp = spellsp:main"]},
+    entry_points={
+        "console_scripts": [
+            "spellsp = spellsp:main",
+            "spellsp-replay = spellsp.main:replay_main",
+        ]
+    },
     packages=setuptools.find_packages("src"),
     package_dir={"": "src"},
     python_requires=">=3.10",
@@ -0,0 +1,499 @@
+import os
+import sys
+import math
+import mmap
+import struct
+import tempfile
+import hashlib
+import logging
+import functools
+import itertools
+from pathlib import Path
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Iterator, Optional, Protocol
+
+BLOOM_HEADER = struct.Struct("<4sIQQ")
+BLOOM_MAGIC = b"SPBF"
+SHARED_HEADER = struct.Struct("<4sQ")
+SHARED_OFFSETS = struct.Struct("<QQ")
+SHARED_MAGIC = b"SPSD"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "spellsp"
+
+
+class Dictionary(Protocol):
+    def casings(self, folded: str) -> tuple[str, ...]: ...
+
+    def __contains__(self, word: object) -> bool: ...
+
+    @property
+    def memory(self) -> int: ...
+
+
+# TODO: affixes
+def make_wordset(path: Path) -> set[str]:
+    """simplified word list spell checking"""
+    with path.open() as f:
+        return {line.strip().split("/", 1)[0] for line in f}
+
+
+def estimate_dict_size(keys: int) -> int:
+    """approximate memory footprint of a str-keyed dict without building it"""
+    # dicts keep their table at most 2/3 full, rounded up to a power of two,
+    # with an index per slot sized to address the table
+    slots = 8
+    while slots * 2 // 3 < keys:
+        slots *= 2
+    index_bytes = next(size for size in (1, 2, 4, 8) if slots < 2 ** (8 * size))
+    # str-only tables drop the cached hash from each entry since 3.11
+    entry_bytes = 16 if sys.version_info >= (3, 11) else 24
+    return sys.getsizeof({}) + 32 + slots * index_bytes + slots * 2 // 3 * entry_bytes
+
+
+class CaseIndex:
+    """map case-folded words to the casings the dictionary lists them in"""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self._index: dict[str, tuple[str, ...]] = {}
+        self._memory: Optional[int] = None
+        for word in words:
+            if word:
+                self.add(word)
+
+    def add(self, word: str) -> None:
+        folded = word.casefold()
+        # share the string object for the common all-lowercase case
+        key = word if folded == word else folded
+        casings = self._index.get(key, ())
+        if word not in casings:
+            self._index[key] = casings + (word,)
+            self._memory = None
+
+    def discard(self, word: str) -> None:
+        folded = word.casefold()
+        casings = tuple(casing for casing in self.casings(folded) if casing != word)
+        self._memory = None
+        if casings:
+            self._index[folded] = casings
+        else:
+            self._index.pop(folded, None)
+
+    def casings(self, folded: str) -> tuple[str, ...]:
+        return self._index.get(folded, ())
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and word in self.casings(word.casefold())
+
+    def __iter__(self) -> Iterator[str]:
+        return (word for casings in self._index.values() for word in casings)
+
+    def __len__(self) -> int:
+        return sum(len(casings) for casings in self._index.values())
+
+    @property
+    def memory(self) -> int:
+        """approximate memory footprint in bytes"""
+        # walking the whole index is slow, so only do it after changes
+        if self._memory is None:
+            self._memory = sys.getsizeof(self._index) + sum(
+                sys.getsizeof(key)
+                + sys.getsizeof(casings)
+                + sum(sys.getsizeof(word) for word in casings if word is not key)
+                for key, casings in self._index.items()
+            )
+        return self._memory
+
+
+class UserDictionary:
+    """a dictionary with words added or removed by the user layered on top"""
+
+    def __init__(self, base: Dictionary, added: CaseIndex, removed: set[str]) -> None:
+        self.base = base
+        self.added = added
+        self.removed = removed
+
+    def casings(self, folded: str) -> tuple[str, ...]:
+        casings = self.base.casings(folded) + self.added.casings(folded)
+        if self.removed:
+            casings = tuple(casing for casing in casings if casing not in self.removed)
+        return casings
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and word in self.casings(word.casefold())
+
+    @property
+    def memory(self) -> int:
+        return self.base.memory + self.added.memory
+
+
+def index_entries(words: Iterable[str]) -> list[bytes]:
+    """encode words as sorted "folded<TAB>word" entries
+
+    Entries sharing a folded form sort next to each other, since the tab
+    sorts before any letter.
+    """
+    return sorted(
+        f"{word.casefold()}\t{word}".encode("utf8") for word in set(words) if word
+    )
+
+
+class BloomFilter:
+    """fixed-size Bloom filter over utf-8 encoded words"""
+
+    def __init__(
+        self, bits: int, hashes: int, data: Optional[bytearray] = None
+    ) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8) if data is None else data
+
+    @staticmethod
+    def for_capacity(words: int, error_rate: float) -> "BloomFilter":
+        bits = max(8, math.ceil(-words * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / max(words, 1) * math.log(2)))
+        return BloomFilter(bits, hashes)
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(
+            self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+def sorted_lines(mm: mmap.mmap | bytes, start: int = 0) -> Iterator[bytes]:
+    while start < len(mm):
+        end = mm.find(b"\n", start)
+        if end == -1:
+            end = len(mm)
+        yield mm[start:end]
+        start = end + 1
+
+
+def write_atomic(path: Path, chunks: Iterable[bytes]) -> None:
+    """write a file under a unique temporary name, then move it into place"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", delete=False
+    ) as f:
+        try:
+            f.writelines(chunks)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def build_sorted(path: Path, sorted_path: Path) -> None:
+    """write a dictionary's index entries one per line in utf-8 byte order"""
+    # this is the only step that holds the whole word list in memory
+    entries = index_entries(make_wordset(path))
+    write_atomic(sorted_path, (entry + b"\n" for entry in entries))
+
+
+class DiskDictionary:
+    """word lookup by binary search of a memory-mapped sorted index file
+
+    A Bloom filter over folded words rejects most unknown words without
+    touching the file, and a bounded cache answers frequently repeated words
+    from memory.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        cache_dir: Optional[Path] = None,
+        error_rate: float = 0.01,
+        cache_size: int = 4096,
+    ) -> None:
+        cache_dir = cache_dir or CACHE_DIR
+        path_key = hashlib.sha1(str(path.resolve()).encode("utf8")).hexdigest()[:16]
+        # any replacement of the source, even with an older mtime, changes the key
+        stat = path.stat()
+        source = f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+        source_key = hashlib.sha1(source.encode("utf8")).hexdigest()[:16]
+        prefix = f"{path.name}-{path_key}-"
+        sorted_path = cache_dir / f"{prefix}{source_key}.index"
+        bloom_path = cache_dir / f"{prefix}{source_key}.bloom"
+        if not sorted_path.exists():
+            logging.info(f"sorting {path} into {sorted_path}")
+            build_sorted(path, sorted_path)
+            for old_path in cache_dir.glob(f"{prefix}*"):
+                if old_path.suffix in (".index", ".bloom") and old_path not in (
+                    sorted_path,
+                    bloom_path,
+                ):
+                    old_path.unlink(missing_ok=True)
+        self._file = sorted_path.open("rb")
+        # empty files cannot be mapped
+        self._mm: mmap.mmap | bytes = b""
+        if sorted_path.stat().st_size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if not bloom_path.exists():
+            self._build_bloom(error_rate)
+            self._save_bloom(bloom_path)
+        else:
+            self._load_bloom(bloom_path)
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._search)
+
+    def _build_bloom(self, error_rate: float) -> None:
+        # estimate the CaseIndex the set backend would build, in the same layout
+        self.words = 0
+        keys = 0
+        objects = 0
+        last_folded = None
+        for line in sorted_lines(self._mm):
+            folded, _, word = line.decode("utf8").partition("\t")
+            self.words += 1
+            if folded != last_folded:
+                keys += 1
+                objects += sys.getsizeof(folded) + sys.getsizeof(())
+                last_folded = folded
+            # one more casings slot, and a string unless it is shared with the key
+            objects += struct.calcsize("P")
+            if word != folded:
+                objects += sys.getsizeof(word)
+        self.set_size = estimate_dict_size(keys) + objects
+        self.bloom = BloomFilter.for_capacity(self.words, error_rate)
+        for line in sorted_lines(self._mm):
+            self.bloom.add(line.partition(b"\t")[0])
+
+    def _save_bloom(self, bloom_path: Path) -> None:
+        header = BLOOM_HEADER.pack(
+            BLOOM_MAGIC, self.bloom.hashes, self.bloom.bits, self.set_size
+        )
+        write_atomic(
+            bloom_path, (header, struct.pack("<Q", self.words), self.bloom.data)
+        )
+
+    def _load_bloom(self, bloom_path: Path) -> None:
+        data = bloom_path.read_bytes()
+        magic, hashes, bits, self.set_size = BLOOM_HEADER.unpack_from(data)
+        if magic != BLOOM_MAGIC:
+            raise ValueError(f"invalid bloom filter file {bloom_path}")
+        offset = BLOOM_HEADER.size
+        (self.words,) = struct.unpack_from("<Q", data, offset)
+        self.bloom = BloomFilter(bits, hashes, bytearray(data[offset + 8 :]))
+
+    def _search(self, prefix: bytes) -> tuple[str, ...]:
+        mm = self._mm
+        lo, hi = 0, len(mm)
+        # lo and hi always sit at the start of a line; find the first line >= prefix
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", lo, mid) + 1 or lo
+            end = mm.find(b"\n", start, hi)
+            if end == -1:
+                end = hi
+            if mm[start:end] < prefix:
+                lo = end + 1
+            else:
+                hi = start
+        casings = []
+        for line in sorted_lines(mm, lo):
+            if not line.startswith(prefix):
+                break
+            casings.append(line[len(prefix) :].decode("utf8"))
+        return tuple(casings)
+
+    def casings(self, folded: str) -> tuple[str, ...]:
+        key = folded.encode("utf8")
+        if key not in self.bloom:
+            return ()
+        return self._lookup(key + b"\t")
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and word in self.casings(word.casefold())
+
+    @property
+    def memory(self) -> int:
+        """approximate resident footprint in bytes, excluding the page cache"""
+        # key, casings, and lru node
+        cache_entry = sys.getsizeof(b"") + sys.getsizeof(("",)) + 100
+        cached = self._lookup.cache_info().currsize
+        return sys.getsizeof(self.bloom.data) + cached * cache_entry
+
+    def report(self) -> str:
+        return (
+            f"{self.words} words: {self.memory} bytes on disk backend, "
+            f"~{self.set_size} bytes on set backend"
+        )
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+
+class SharedDictionary:
+    """word lookup against a sorted word table in a shared memory block
+
+    The block holds a header, the byte offsets of each entry, and the utf-8
+    "folded<TAB>word" entries back to back in sorted order. Other processes
+    attach to the block by name and search it in place; pickling a
+    SharedDictionary (e.g. to pass it to a multiprocessing worker) attaches
+    instead of copying the words.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False) -> None:
+        self._shm = shm
+        self._owner = owner
+        magic, self.words = SHARED_HEADER.unpack_from(shm.buf)
+        if magic != SHARED_MAGIC:
+            raise ValueError(f"invalid shared dictionary block {shm.name}")
+        self._blob_start = SHARED_HEADER.size + 8 * (self.words + 1)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @staticmethod
+    def create(words: Iterable[str], name: Optional[str] = None) -> "SharedDictionary":
+        keys = index_entries(words)
+        blob_start = SHARED_HEADER.size + 8 * (len(keys) + 1)
+        size = blob_start + sum(len(key) for key in keys)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        SHARED_HEADER.pack_into(shm.buf, 0, SHARED_MAGIC, len(keys))
+        offsets = itertools.accumulate(map(len, keys), initial=0)
+        struct.pack_into(f"<{len(keys) + 1}Q", shm.buf, SHARED_HEADER.size, *offsets)
+        shm.buf[blob_start:size] = b"".join(keys)
+        return SharedDictionary(shm, owner=True)
+
+    @staticmethod
+    def from_path(path: Path, name: Optional[str] = None) -> "SharedDictionary":
+        return SharedDictionary.create(make_wordset(path), name)
+
+    @staticmethod
+    def attach(name: str) -> "SharedDictionary":
+        return SharedDictionary(shared_memory.SharedMemory(name=name))
+
+    def __reduce__(self) -> tuple[Any, tuple[str]]:
+        return SharedDictionary.attach, (self.name,)
+
+    def _entry(self, i: int) -> bytes:
+        # no views into the block are kept, so it can always be closed
+        position = SHARED_HEADER.size + 8 * i
+        start, end = SHARED_OFFSETS.unpack_from(self._shm.buf, position)
+        return bytes(self._shm.buf[self._blob_start + start : self._blob_start + end])
+
+    def casings(self, folded: str) -> tuple[str, ...]:
+        prefix = folded.encode("utf8") + b"\t"
+        lo, hi = 0, self.words
+        # find the first entry >= prefix
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        casings = []
+        while lo < self.words and (entry := self._entry(lo)).startswith(prefix):
+            casings.append(entry[len(prefix) :].decode("utf8"))
+            lo += 1
+        return tuple(casings)
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and word in self.casings(word.casefold())
+
+    @property
+    def memory(self) -> int:
+        """size of the shared block in bytes, paid once across all processes"""
+        return self._shm.size
+
+    def close(self) -> None:
+        """detach from the block; the creating process also frees it"""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class DictionaryCache:
+    """lazily load dictionaries by language, evicting the least recently used"""
+
+    def __init__(
+        self,
+        paths: dict[str, Path],
+        max_bytes: Optional[int] = None,
+        backend: str = "set",
+    ) -> None:
+        self._paths = paths
+        self._max_bytes = max_bytes
+        self._backend = backend
+        self._loaded: OrderedDict[str, Dictionary] = OrderedDict()
+        # user words outlive eviction of the dictionary they modify
+        self._user: dict[str, tuple[CaseIndex, set[str]]] = {}
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self._paths)
+
+    @property
+    def loaded(self) -> list[str]:
+        return list(self._loaded)
+
+    @property
+    def memory(self) -> int:
+        return sum(dictionary.memory for dictionary in self._loaded.values())
+
+    def path(self, lang: str) -> Path:
+        return self._paths[lang]
+
+    def _evict(self) -> None:
+        if self._max_bytes is None:
+            return
+        # never evict the most recently used dictionary, even if over budget
+        while len(self._loaded) > 1 and self.memory > self._max_bytes:
+            lang, dictionary = self._loaded.popitem(last=False)
+            if isinstance(dictionary, DiskDictionary):
+                dictionary.close()
+            logging.info(f"evicted dictionary {lang}")
+
+    def _load(self, path: Path) -> Dictionary:
+        match self._backend:
+            case "set":
+                index = CaseIndex(make_wordset(path))
+                logging.info(
+                    f"loaded {path}; {len(index)} words: "
+                    f"{index.memory} bytes on set backend"
+                )
+                return index
+            case "disk":
+                dictionary = DiskDictionary(path)
+                logging.info(f"loaded {path}; {dictionary.report()}")
+                return dictionary
+            case _:
+                raise ValueError(f"unknown dictionary backend {self._backend}")
+
+    def _get(self, lang: str) -> Dictionary:
+        if lang in self._loaded:
+            self._loaded.move_to_end(lang)
+            return self._loaded[lang]
+        logging.info(f"loading dictionary {lang} from {self._paths[lang]}")
+        dictionary = self._load(self._paths[lang])
+        self._loaded[lang] = dictionary
+        self._evict()
+        return dictionary
+
+    def get(self, lang: str) -> Dictionary:
+        dictionary = self._get(lang)
+        if lang in self._user:
+            return UserDictionary(dictionary, *self._user[lang])
+        return dictionary
+
+    def add_word(self, lang: str, word: str) -> None:
+        added, removed = self._user.setdefault(lang, (CaseIndex([]), set()))
+        removed.discard(word)
+        added.add(word)
+
+    def remove_word(self, lang: str, word: str) -> None:
+        added, removed = self._user.setdefault(lang, (CaseIndex([]), set()))
+        added.discard(word)
+        removed.add(word)
@@ -6,20 +6,27 @@ from typing import Any, Optional, Protocol, TextIO
 from .structures import (
     JsonrpcStream,
     TextDocument,
+    Range,
     Diagnostic,
     PublishDiagnosticParams,
 )
-from .spellcheck import check_spelling
+from .spellcheck import WRONG_CASE
+from .dictionaries import make_wordset
+from .languages import MODELINE_LINES, LanguageSelector
+from .documents import Document
 
 INIT_RESULT = {
     "capabilities": {
-        "PositionEncoding": "utf-8",
+        "positionEncoding": "utf-16",
         "diagnosticProvider": {
             "identifier": "Spelling",
             "interFileDependencies": False,
             "workspaceDiagnostics": False,
         },
-        "textDocumentSync": 1,
+        "textDocumentSync": 2,
+        "executeCommandProvider": {
+            "commands": ["spellsp.addWord", "spellsp.removeWord"],
+        },
     },
     "serverInfo": {
         "name": "spellsp",
@@ -76,28 +83,106 @@ def extract_doc(message_params: dict[Any, Any]) -> TextDocument:
     return TextDocument(uri, text, version)
 
 
-def publish_diagnostics(stream: JsonrpcStream, wordset: set[str]) -> None:
-    doc = extract_doc(stream.last_message["params"])
+def make_diagnostic(
+    spell_range: Range, error: str, casings: tuple[str, ...]
+) -> Diagnostic:
+    if error == WRONG_CASE:
+        expected = " or ".join(casings)
+        return Diagnostic(spell_range, f"{WRONG_CASE}; expected {expected}", 2)
+    return Diagnostic(spell_range, error, 1)
+
+
+def send_diagnostics(stream: JsonrpcStream, document: Document) -> None:
     diagnostics = [
-        Diagnostic(spell_range) for spell_range in check_spelling(doc.text, wordset)
+        make_diagnostic(spell_range, error, casings)
+        for spell_range, error, _, casings in document.misspellings()
     ]
     publish_params = PublishDiagnosticParams(
-        uri=doc.uri,
+        uri=document.uri,
         diagnostics=diagnostics,
-        version=doc.version,
+        version=document.version,
     )
     stream.send_notification("textDocument/publishDiagnostics", publish_params)
 
 
-# TODO: affixes, proper capitalization detection
-def make_wordset(path: Path) -> set[str]:
-    """simplified word list spell checking"""
-    with path.open() as f:
-        return {line.strip().split("/", 1)[0] for line in f}
+def open_document(
+    stream: JsonrpcStream, selector: LanguageSelector, documents: dict[str, Document]
+) -> None:
+    doc = extract_doc(stream.last_message["params"])
+    selector.forget(doc.uri)
+    document = Document(doc.uri, doc.text, doc.version)
+    document.language = selector.language(doc)
+    dictionary = selector.dictionaries.get(document.language)
+    document.check(dictionary)
+    documents[doc.uri] = document
+    send_diagnostics(stream, document)
+
+
+def change_document(
+    stream: JsonrpcStream, selector: LanguageSelector, documents: dict[str, Document]
+) -> None:
+    params = stream.last_message["params"]
+    uri = params["textDocument"]["uri"]
+    document = documents.setdefault(uri, Document(uri, ""))
+    document.version = params["textDocument"].get("version")
+    edges = document.edge_lines(MODELINE_LINES)
+    changed_lines = [
+        line
+        for change in params["contentChanges"]
+        for line in document.apply_change(change)
+    ]
+    if not selector.detected(uri) or document.edge_lines(MODELINE_LINES) != edges:
+        doc = TextDocument(uri, document.text, document.version)
+        language = selector.language(doc)
+    else:
+        language = document.language
+    dictionary = selector.dictionaries.get(language)
+    if language != document.language:
+        document.language = language
+        document.check(dictionary)
+    else:
+        document.check_lines(changed_lines, dictionary)
+    send_diagnostics(stream, document)
+
+
+def execute_command(
+    stream: JsonrpcStream, selector: LanguageSelector, documents: dict[str, Document]
+) -> None:
+    """add or remove a user word, rechecking only where the word occurs"""
+    message = stream.last_message
+    command = message["params"].get("command")
+    arguments = message["params"].get("arguments") or []
+    if command not in ("spellsp.addWord", "spellsp.removeWord") or not arguments:
+        stream.send_error(
+            message.get("id"),
+            {"code": -32602, "message": f"invalid command {command}"},
+        )
+        return
+    if not all(isinstance(argument, str) for argument in arguments[:2]):
+        stream.send_error(
+            message.get("id"),
+            {"code": -32602, "message": f"invalid arguments for {command}"},
+        )
+        return
+    word = arguments[0]
+    document = documents.get(arguments[1]) if len(arguments) > 1 else None
+    if document is not None and document.language is not None:
+        language = document.language
+    else:
+        language = selector.default
+    if command == "spellsp.addWord":
+        selector.dictionaries.add_word(language, word)
+    else:
+        selector.dictionaries.remove_word(language, word)
+    stream.send_response(message.get("id"), None)
+    dictionary = selector.dictionaries.get(language)
+    for document in documents.values():
+        if document.language == language and document.update_word(word, dictionary):
+            send_diagnostics(stream, document)
 
 
-def dispatch(stream: JsonrpcStream, wordset_path: Path) -> None:
-    wordset = make_wordset(wordset_path)
+def dispatch(stream: JsonrpcStream, selector: LanguageSelector) -> None:
+    documents: dict[str, Document] = {}
     initialize(stream)
     while stream.read_message():
         match stream.last_message["method"]:
@@ -105,6 +190,14 @@ def dispatch(stream: JsonrpcStream, wordset_path: Path) -> None:
                 break
             case "exit":
                 exit(1)  # did not receive "shutdown" request; exit with code 1
-            case "textDocument/didOpen" | "textDocument/didChange":
-                publish_diagnostics(stream, wordset)
+            case "textDocument/didOpen":
+                open_document(stream, selector, documents)
+            case "textDocument/didChange":
+                change_document(stream, selector, documents)
+            case "textDocument/didClose":
+                uri = stream.last_message["params"]["textDocument"]["uri"]
+                selector.forget(uri)
+                documents.pop(uri, None)
+            case "workspace/executeCommand":
+                execute_command(stream, selector, documents)
     shutdown(stream)
@@ -0,0 +1,179 @@
+import re
+from typing import Any, Optional
+from dataclasses import dataclass, field
+
+from .structures import Position, Range
+from .dictionaries import Dictionary
+from .spellcheck import splitwords, spelling_error
+
+LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def split_lines(text: str) -> list[str]:
+    """split text on LSP line breaks, keeping a trailing empty line"""
+    return LINE_BREAK.split(text)
+
+
+def utf16_length(text: str) -> int:
+    """length of text in UTF-16 code units, the LSP's default position unit"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def code_point_index(text: str, units: int) -> int:
+    """convert a UTF-16 offset into a line to a string index, clamped to the line"""
+    if text.isascii():
+        return min(units, len(text))
+    for i, char in enumerate(text):
+        units -= 2 if ord(char) > 0xFFFF else 1
+        if units < 0:
+            return i
+    return len(text)
+
+
+@dataclass(eq=False)
+class Line:
+    number: int
+    text: str
+    tokens: list[tuple[int, str]]
+    # offset -> (error, word, casings) for each misspelled token
+    errors: dict[int, tuple[str, str, tuple[str, ...]]] = field(default_factory=dict)
+
+
+class Document:
+    """an open document's tokens by line, with an inverted word -> lines map
+
+    Edits only re-tokenize the lines they touch, and a dictionary change only
+    rechecks the lines holding the changed word.
+    """
+
+    def __init__(self, uri: str, text: str, version: Optional[int] = None) -> None:
+        self.uri = uri
+        self.version = version
+        self.language: Optional[str] = None
+        self.lines: list[Line] = []
+        # case-folded word -> lines it occurs on
+        self.positions: dict[str, set[Line]] = {}
+        self._error_lines: set[Line] = set()
+        self._splice(0, 0, split_lines(text))
+
+    @property
+    def text(self) -> str:
+        return "\n".join(line.text for line in self.lines)
+
+    def edge_lines(self, count: int) -> list[str]:
+        """the first and last lines, where modelines live"""
+        return [line.text for line in self.lines[:count] + self.lines[-count:]]
+
+    def _splice(self, start: int, end: int, texts: list[str]) -> list[Line]:
+        """replace lines [start, end) with new lines, returning the new lines"""
+        for line in self.lines[start:end]:
+            for folded in {word.casefold() for _, word in line.tokens}:
+                lines = self.positions[folded]
+                lines.discard(line)
+                if not lines:
+                    del self.positions[folded]
+            self._error_lines.discard(line)
+        new_lines = [
+            Line(start + i, text, splitwords(text)) for i, text in enumerate(texts)
+        ]
+        for line in new_lines:
+            for _, word in line.tokens:
+                self.positions.setdefault(word.casefold(), set()).add(line)
+        self.lines[start:end] = new_lines
+        if len(new_lines) != end - start:
+            for number in range(start + len(new_lines), len(self.lines)):
+                self.lines[number].number = number
+        return new_lines
+
+    def apply_change(self, change: dict[Any, Any]) -> list[Line]:
+        """apply a didChange content change, returning the re-tokenized lines"""
+        if "range" not in change:
+            # full sync: splice in only the lines that differ
+            texts = split_lines(change["text"])
+            old = [line.text for line in self.lines]
+            start = 0
+            while start < min(len(old), len(texts)) and old[start] == texts[start]:
+                start += 1
+            end, new_end = len(old), len(texts)
+            while (
+                end > start and new_end > start and old[end - 1] == texts[new_end - 1]
+            ):
+                end -= 1
+                new_end -= 1
+            return self._splice(start, end, texts[start:new_end])
+        start_line, start_char = self._position(change["range"]["start"])
+        end_line, end_char = self._position(change["range"]["end"])
+        text = (
+            self.lines[start_line].text[:start_char]
+            + change["text"]
+            + self.lines[end_line].text[end_char:]
+        )
+        return self._splice(start_line, end_line + 1, split_lines(text))
+
+    def _position(self, position: dict[str, int]) -> tuple[int, int]:
+        """convert an LSP position to a line and string index, clamped to the text"""
+        if position["line"] >= len(self.lines):
+            return len(self.lines) - 1, len(self.lines[-1].text)
+        text = self.lines[position["line"]].text
+        return position["line"], code_point_index(text, position["character"])
+
+    def _check_token(
+        self, line: Line, offset: int, word: str, dictionary: Dictionary
+    ) -> None:
+        if (found := spelling_error(word, dictionary)) is None:
+            line.errors.pop(offset, None)
+        else:
+            error, casings = found
+            line.errors[offset] = (error, word, casings)
+
+    def check_lines(self, lines: list[Line], dictionary: Dictionary) -> None:
+        for line in lines:
+            # skip lines already replaced by a later edit
+            if line.number >= len(self.lines) or self.lines[line.number] is not line:
+                continue
+            line.errors.clear()
+            for offset, word in line.tokens:
+                self._check_token(line, offset, word, dictionary)
+            if line.errors:
+                self._error_lines.add(line)
+            else:
+                self._error_lines.discard(line)
+
+    def check(self, dictionary: Dictionary) -> None:
+        self.check_lines(self.lines, dictionary)
+
+    def update_word(self, word: str, dictionary: Dictionary) -> bool:
+        """recheck only the occurrences of a word; return whether any exist"""
+        folded = word.casefold()
+        lines = self.positions.get(folded, set())
+        for line in lines:
+            for offset, token in line.tokens:
+                if token.casefold() == folded:
+                    self._check_token(line, offset, token, dictionary)
+            if line.errors:
+                self._error_lines.add(line)
+            else:
+                self._error_lines.discard(line)
+        return bool(lines)
+
+    def misspellings(self) -> list[tuple[Range, str, str, tuple[str, ...]]]:
+        """return ranges of spelling errors with their kind, word and known casings
+
+        Ranges count UTF-16 code units, as LSP positions do.
+        """
+        return [
+            (self._range(line, offset, word), error, word, casings)
+            for line in sorted(self._error_lines, key=lambda line: line.number)
+            for offset, (error, word, casings) in sorted(line.errors.items())
+        ]
+
+    def _range(self, line: Line, offset: int, word: str) -> Range:
+        if line.text.isascii():
+            return Range.from_word(line.number, offset, word)
+        start = utf16_length(line.text[:offset])
+        return Range(
+            Position(line.number, start),
+            Position(line.number, start + utf16_length(word)),
+        )
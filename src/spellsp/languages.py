@@ -0,0 +1,140 @@
+import re
+import math
+import logging
+import fnmatch
+from pathlib import Path
+from collections import Counter
+from typing import Optional
+
+from .structures import TextDocument
+from .dictionaries import DictionaryCache
+from .spellcheck import splitwords
+
+MODELINE_PATTERN = re.compile(r"\b(?:spelllang|spellsp-lang)\s*[=:]\s*\"?([\w-]+)")
+MODELINE_LINES = 5
+SAMPLE_CHARS = 4096
+SAMPLE_CHUNKS = 16
+CHUNK_BYTES = 4096
+PROFILE_SIZE = 300
+# too few words or too weak a match to trust; fall back to the default instead
+MIN_SAMPLE_WORDS = 3
+MIN_SIMILARITY = 0.1
+
+
+def modeline_language(text: str) -> Optional[str]:
+    """find a language set in a modeline in the first or last lines of a buffer"""
+    lines = text.splitlines()
+    for line in lines[:MODELINE_LINES] + lines[-MODELINE_LINES:]:
+        if match := MODELINE_PATTERN.search(line):
+            return match.group(1)
+    return None
+
+
+def make_profile(words: list[str]) -> Counter[str]:
+    """count the most common character trigrams in a list of words"""
+    trigrams: Counter[str] = Counter()
+    for word in words:
+        padded = f" {word.lower()} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return Counter(dict(trigrams.most_common(PROFILE_SIZE)))
+
+
+def sample_words(path: Path) -> list[str]:
+    """read words from chunks spread evenly over a dictionary file"""
+    with path.open("rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size <= SAMPLE_CHUNKS * CHUNK_BYTES:
+            lines = f.read().decode("utf8", errors="ignore").splitlines()
+        else:
+            lines = []
+            for i in range(SAMPLE_CHUNKS):
+                f.seek(size * i // SAMPLE_CHUNKS)
+                chunk = f.read(CHUNK_BYTES).decode("utf8", errors="ignore")
+                # drop partial lines at either end of the chunk
+                lines.extend(chunk.splitlines()[1 if i else 0 : -1])
+    return [
+        word
+        for line in lines
+        if (word := line.strip().split("/", 1)[0]) and not word.isdigit()
+    ]
+
+
+def similarity(a: Counter[str], b: Counter[str]) -> float:
+    """cosine similarity between two trigram profiles"""
+    dot = sum(count * b[trigram] for trigram, count in a.items() if trigram in b)
+    norm = math.sqrt(sum(n * n for n in a.values()) * sum(n * n for n in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def detect_language(text: str, profiles: dict[str, Counter[str]]) -> Optional[str]:
+    """guess the language of a buffer by its closest trigram profile"""
+    words = [
+        word
+        for line in text[:SAMPLE_CHARS].splitlines()
+        for _, word in splitwords(line)
+    ]
+    if len(words) < MIN_SAMPLE_WORDS:
+        return None
+    profile = make_profile(words)
+    scores = {lang: similarity(profile, other) for lang, other in profiles.items()}
+    best = max(scores, key=scores.__getitem__)
+    return best if scores[best] >= MIN_SIMILARITY else None
+
+
+class LanguageSelector:
+    """pick a dictionary per document from configuration, modeline, or detection"""
+
+    def __init__(
+        self,
+        dictionaries: DictionaryCache,
+        patterns: Optional[list[tuple[str, str]]] = None,
+        default: Optional[str] = None,
+    ) -> None:
+        self.dictionaries = dictionaries
+        self._patterns = patterns or []
+        self._default = default or dictionaries.languages[0]
+        self._profiles: dict[str, Counter[str]] = {}
+        self._documents: dict[str, str] = {}
+
+    def _profile(self, lang: str) -> Counter[str]:
+        if lang not in self._profiles:
+            path = self.dictionaries.path(lang)
+            self._profiles[lang] = make_profile(sample_words(path))
+        return self._profiles[lang]
+
+    def _detect(self, doc: TextDocument) -> Optional[str]:
+        if (lang := modeline_language(doc.text)) is not None:
+            if lang in self.dictionaries.languages:
+                return lang
+            logging.warning(f"no dictionary for modeline language {lang}")
+        for pattern, lang in self._patterns:
+            if fnmatch.fnmatch(doc.uri, pattern):
+                return lang
+        if doc.uri in self._documents:
+            return self._documents[doc.uri]
+        if len(self.dictionaries.languages) == 1:
+            return self._default
+        profiles = {lang: self._profile(lang) for lang in self.dictionaries.languages}
+        return detect_language(doc.text, profiles)
+
+    def language(self, doc: TextDocument) -> str:
+        """the document's language, falling back to the default until one is found"""
+        lang = self._detect(doc)
+        if lang is None:
+            # nothing to go on yet; don't remember the fallback as a detection
+            return self._default
+        if self._documents.get(doc.uri) != lang:
+            logging.info(f"using {lang} dictionary for {doc.uri}")
+        self._documents[doc.uri] = lang
+        return lang
+
+    @property
+    def default(self) -> str:
+        return self._default
+
+    def detected(self, uri: str) -> bool:
+        return uri in self._documents
+
+    def forget(self, uri: str) -> None:
+        self._documents.pop(uri, None)
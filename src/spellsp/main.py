@@ -1,29 +1,112 @@
 import sys
 import logging
+import pstats
 import argparse
+import cProfile
+import tracemalloc
 from pathlib import Path
-from typing import TextIO
+from typing import Optional, TextIO
 
 from .dispatch import dispatch
 from .structures import JsonrpcStream
+from .dictionaries import DictionaryCache
+from .languages import LanguageSelector
+from .replay import RecordingStream, format_report, load_trace, replay
 
 
-def parse_args(args: list[str]) -> tuple[TextIO, TextIO, Path]:
-    """get dictionary path as arg"""
-    parser = argparse.ArgumentParser()
+def split_assignment(arg: str) -> tuple[str, str]:
+    """split a KEY=VALUE argument; a missing key is returned empty"""
+    key, sep, value = arg.partition("=")
+    return (key, value) if sep else ("", arg)
+
+
+def add_dictionary_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "-f",
         "--file",
-        type=Path,
-        help="dictionary file; Hunspell format or a plain-text word list",
+        action="append",
+        type=split_assignment,
+        required=True,
+        metavar="[LANG=]FILE",
+        help="dictionary file; Hunspell format or a plain-text word list; "
+        "may be repeated with a language name for each",
     )
+    parser.add_argument(
+        "-l",
+        "--language",
+        action="append",
+        type=split_assignment,
+        default=[],
+        metavar="GLOB=LANG",
+        help="use the LANG dictionary for document URIs matching GLOB",
+    )
+    parser.add_argument(
+        "--default-language",
+        default=None,
+        help="dictionary used when no language is detected; defaults to the first",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        default=None,
+        help="memory budget for loaded dictionaries in MiB; defaults to unlimited",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["set", "disk"],
+        default="set",
+        help="dictionary lookup; an in-memory set, "
+        "or a memory-mapped sorted file behind a Bloom filter for huge lexicons",
+    )
+
+
+def make_selector(
+    parser: argparse.ArgumentParser, parsed_args: argparse.Namespace
+) -> LanguageSelector:
+    """build the dictionary selector from parsed dictionary args"""
+    paths: dict[str, Path] = {}
+    for lang, path in parsed_args.file:
+        lang = lang or "default"
+        if lang in paths:
+            parser.error(f"more than one dictionary for language {lang}")
+        paths[lang] = Path(path)
+    for _, lang in parsed_args.language:
+        if lang not in paths:
+            parser.error(f"no dictionary for language {lang}")
+    if parsed_args.default_language not in (None, *paths):
+        parser.error(f"no dictionary for language {parsed_args.default_language}")
+    if parsed_args.max_memory is None:
+        max_bytes = None
+    else:
+        max_bytes = int(parsed_args.max_memory * 2**20)
+    return LanguageSelector(
+        DictionaryCache(paths, max_bytes, parsed_args.backend),
+        patterns=parsed_args.language,
+        default=parsed_args.default_language,
+    )
+
+
+def parse_args(
+    args: list[str],
+) -> tuple[TextIO, TextIO, LanguageSelector, Optional[Path]]:
+    """get dictionary paths as args"""
+    parser = argparse.ArgumentParser()
+    add_dictionary_args(parser)
     parser.add_argument(
         "-i", "--input", default=None, help="input handle; defaults to stdin"
     )
     parser.add_argument(
         "-o", "--output", default=None, help="output handle; defaults to stdout"
     )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="record the session with timestamps to a trace file for spellsp-replay",
+    )
     parsed_args = parser.parse_args(args)
+    selector = make_selector(parser, parsed_args)
     if parsed_args.input is None:
         input_stream = sys.stdin
     else:
@@ -32,13 +115,73 @@ def parse_args(args: list[str]) -> tuple[TextIO, TextIO, Path]:
         output_stream = sys.stdout
     else:
         output_stream = open(parsed_args.output, "w")
-    wordset_path = parsed_args.file
-    return input_stream, output_stream, wordset_path
+    return input_stream, output_stream, selector, parsed_args.record
 
 
 def main() -> None:
     logging.basicConfig(filename="spellsp.log", encoding="utf8", level=logging.DEBUG)
     logging.debug("\n\n")
-    input_stream, output_stream, wordset_path = parse_args(sys.argv[1:])
-    stream = JsonrpcStream(input_stream, output_stream)
-    dispatch(stream, wordset_path=wordset_path)
+    input_stream, output_stream, selector, record_path = parse_args(sys.argv[1:])
+    if record_path is None:
+        stream = JsonrpcStream(input_stream, output_stream)
+    else:
+        stream = RecordingStream(input_stream, output_stream, record_path.open("w"))
+    dispatch(stream, selector=selector)
+
+
+def parse_replay_args(
+    args: list[str],
+) -> tuple[argparse.Namespace, LanguageSelector]:
+    """get trace and dictionary paths as args"""
+    parser = argparse.ArgumentParser(prog="spellsp-replay")
+    parser.add_argument("trace", type=Path, help="trace file recorded with --record")
+    add_dictionary_args(parser)
+    parser.add_argument(
+        "--paced",
+        action="store_true",
+        help="replay at the recorded pace instead of as fast as possible",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="profile the replay with cProfile; dump stats to FILE if given",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="report peak memory and the top allocation sites",
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args, make_selector(parser, parsed_args)
+
+
+def replay_main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    parsed_args, selector = parse_replay_args(sys.argv[1:])
+    with parsed_args.trace.open() as f:
+        messages = load_trace(f)
+    profiler = cProfile.Profile() if parsed_args.profile is not None else None
+    if parsed_args.tracemalloc:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    stream, elapsed = replay(messages, selector, parsed_args.paced)
+    if profiler is not None:
+        profiler.disable()
+    print(format_report(stream, elapsed))
+    if parsed_args.tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\npeak traced memory: {peak / 2**20:.2f} MiB")
+        for stat in snapshot.statistics("lineno")[:10]:
+            print(stat)
+    if profiler is not None:
+        print()
+        stats = pstats.Stats(profiler)
+        if parsed_args.profile:
+            stats.dump_stats(parsed_args.profile)
+        stats.sort_stats("cumulative").print_stats(25)
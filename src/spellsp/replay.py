@@ -0,0 +1,144 @@
+import io
+import os
+import json
+import time
+from typing import Any, Optional, TextIO
+
+from .dispatch import dispatch
+from .structures import JsonrpcStream, dump
+from .languages import LanguageSelector
+
+CLOSING_MESSAGES = [{"id": None, "method": "shutdown"}, {"method": "exit"}]
+
+
+class RecordingStream(JsonrpcStream):
+    """JSON-RPC stream that logs each message with a timestamp to a trace file
+
+    The trace holds one JSON object per line:
+    {"time": seconds since start, "direction": "in" or "out", "message": {...}}
+    """
+
+    def __init__(
+        self, input_stream: TextIO, output_stream: TextIO, trace: TextIO
+    ) -> None:
+        super().__init__(input_stream, output_stream)
+        self._trace = trace
+        self._start = time.monotonic()
+
+    def _record(self, direction: str, message: dict[Any, Any]) -> None:
+        entry = {
+            "time": time.monotonic() - self._start,
+            "direction": direction,
+            "message": message,
+        }
+        self._trace.write(dump(entry) + "\n")
+        self._trace.flush()
+
+    def close(self) -> None:
+        super().close()
+        self._trace.close()
+
+    def read_message(self) -> dict[Any, Any]:
+        message = super().read_message()
+        self._record("in", message)
+        return message
+
+    def _write_message(self, obj: dict[Any, Any]) -> None:
+        super()._write_message(obj)
+        self._record("out", obj)
+
+
+def load_trace(trace: TextIO) -> list[tuple[float, dict[Any, Any]]]:
+    """read the timestamped client messages from a trace"""
+    messages = []
+    for line in trace:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if entry["direction"] == "in":
+            messages.append((entry["time"], entry["message"]))
+    return messages
+
+
+class ReplayStream(JsonrpcStream):
+    """JSON-RPC stream fed from a trace, timing how long each message takes"""
+
+    def __init__(
+        self, messages: list[tuple[float, dict[Any, Any]]], paced: bool = False
+    ) -> None:
+        super().__init__(io.StringIO(), open(os.devnull, "w"))
+        methods = {message.get("method") for _, message in messages}
+        # end the session cleanly even if the recording was cut short
+        closing = [m for m in CLOSING_MESSAGES if m["method"] not in methods]
+        last_time = messages[-1][0] if messages else 0.0
+        self._messages = messages + [(last_time, message) for message in closing]
+        self._paced = paced
+        # recorded times are relative to the recording, not the first message
+        self._offset = messages[0][0] if messages else 0.0
+        self._index = 0
+        self._start = 0.0
+        self._current: Optional[tuple[str, float]] = None
+        self.latencies: dict[str, list[float]] = {}
+
+    def _finish_current(self, now: float) -> None:
+        if self._current is not None:
+            method, started = self._current
+            self.latencies.setdefault(method, []).append(now - started)
+            self._current = None
+
+    def read_message(self) -> dict[Any, Any]:
+        now = time.perf_counter()
+        if not self._index:
+            self._start = now
+        self._finish_current(now)
+        if self._index >= len(self._messages):
+            raise EOFError("end of trace")
+        recorded, message = self._messages[self._index]
+        self._index += 1
+        if self._paced and (delay := recorded - self._offset - (now - self._start)) > 0:
+            time.sleep(delay)
+            now = time.perf_counter()
+        self._current = (message.get("method", "response"), now)
+        # decode a fresh copy, as the server would from the wire
+        self._last_message = json.loads(dump(message))
+        return self._last_message
+
+    def finish(self) -> None:
+        self._finish_current(time.perf_counter())
+
+
+def replay(
+    messages: list[tuple[float, dict[Any, Any]]],
+    selector: LanguageSelector,
+    paced: bool = False,
+) -> tuple[ReplayStream, float]:
+    """run a recorded session through dispatch, returning the stream and run time"""
+    stream = ReplayStream(messages, paced)
+    start = time.perf_counter()
+    try:
+        dispatch(stream, selector)
+    except SystemExit:
+        pass
+    finally:
+        # an exit without shutdown leaves the stream open
+        stream.close()
+    stream.finish()
+    return stream, time.perf_counter() - start
+
+
+def format_report(stream: ReplayStream, elapsed: float) -> str:
+    count = sum(len(latencies) for latencies in stream.latencies.values())
+    rate = count / elapsed if elapsed else 0.0
+    lines = [
+        f"{count} messages in {elapsed:.3f}s ({rate:.1f} messages/s)",
+        f"{'method':<32} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}",
+    ]
+    for method, latencies in sorted(stream.latencies.items()):
+        ordered = sorted(latencies)
+        lines.append(
+            f"{method:<32} {len(ordered):>6} "
+            f"{sum(ordered) / len(ordered) * 1000:>9.3f} "
+            f"{ordered[len(ordered) // 2] * 1000:>9.3f} "
+            f"{ordered[-1] * 1000:>9.3f}"
+        )
+    return "\n".join(lines)
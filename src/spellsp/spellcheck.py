@@ -1,5 +1,5 @@
 import functools
-from typing import Any
+from typing import Any, Optional
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -9,6 +9,10 @@ from .structures import (
     PublishDiagnosticParams,
     JsonrpcStream,
 )
+from .dictionaries import Dictionary
+
+UNKNOWN_WORD = "unknown word"
+WRONG_CASE = "wrong case"
 
 
 def splitwords(line: str) -> list[tuple[int, str]]:
@@ -38,16 +42,41 @@ def make_wordbag(buffer: str) -> list[tuple[int, int, str]]:
     ]
 
 
-def detitle(word: str) -> str:
-    """uncapitalize first letter of word"""
-    return word[0].lower() + word[1:]
+def spelling_error(
+    word: str, dictionary: Dictionary
+) -> Optional[tuple[str, tuple[str, ...]]]:
+    """classify a word as correct (None), an unknown word, or a wrong-case word
+
+    Errors come with the dictionary's casings of the word, so callers can
+    suggest them without looking the word up again.
+    """
+    casings = dictionary.casings(word.casefold())
+    if not casings:
+        return UNKNOWN_WORD, casings
+    if word in casings or word.isupper():
+        return None
+    # a capitalized word may start a sentence if the dictionary lists it lowercase
+    if word[0].isupper() and any(
+        casing.islower() and casing[1:] == word[1:] for casing in casings
+    ):
+        return None
+    return WRONG_CASE, casings
 
 
 # TODO: corrections
-def check_spelling(buffer: str, wordset: set[str]) -> list[Range]:
+def find_misspellings(
+    buffer: str, dictionary: Dictionary
+) -> list[tuple[Range, str, str, tuple[str, ...]]]:
+    """return ranges of spelling errors with their kind, word and known casings"""
+    misspellings = []
+    for line, offset, word in make_wordbag(buffer):
+        if (found := spelling_error(word, dictionary)) is not None:
+            error, casings = found
+            spell_range = Range.from_word(line, offset, word)
+            misspellings.append((spell_range, error, word, casings))
+    return misspellings
+
+
+def check_spelling(buffer: str, dictionary: Dictionary) -> list[Range]:
     """return ranges of spelling errors"""
-    return [
-        Range.from_word(line, offset, word)
-        for line, offset, word in make_wordbag(buffer)
-        if word not in wordset and detitle(word) not in wordset
-    ]
+    return [misspelling[0] for misspelling in find_misspellings(buffer, dictionary)]
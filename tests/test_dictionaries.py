@@ -0,0 +1,235 @@
+import os
+import pickle
+import struct
+import tempfile
+import multiprocessing
+import unittest
+import unittest.mock as mock
+from pathlib import Path
+
+from src.spellsp.dictionaries import (
+    SHARED_HEADER,
+    BloomFilter,
+    CaseIndex,
+    DictionaryCache,
+    DiskDictionary,
+    SharedDictionary,
+    make_wordset,
+)
+
+
+class TestDictionaryCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        d = Path(self.tempdir.name)
+        self.paths = {
+            "en": d / "en.dic",
+            "de": d / "de.dic",
+            "he": d / "he.dic",
+        }
+        self.paths["en"].write_text("cat\nhat/S\n")
+        self.paths["de"].write_text("Katze\nHut\n")
+        self.paths["he"].write_text("חתול\nכובע\n")
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_lazy_load(self) -> None:
+        cache = DictionaryCache(self.paths)
+        self.assertEqual(cache.loaded, [])
+        self.assertEqual(set(cache.get("de")), {"Katze", "Hut"})
+        self.assertEqual(cache.loaded, ["de"])
+
+    def test_memory(self) -> None:
+        cache = DictionaryCache(self.paths)
+        cache.get("en")
+        index = CaseIndex(make_wordset(self.paths["en"]))
+        self.assertEqual(cache.memory, index.memory)
+
+    def test_evict_least_recently_used(self) -> None:
+        size = max(CaseIndex(make_wordset(path)).memory for path in self.paths.values())
+        cache = DictionaryCache(self.paths, max_bytes=size * 2)
+        cache.get("en")
+        cache.get("de")
+        cache.get("en")
+        cache.get("he")
+        self.assertEqual(cache.loaded, ["en", "he"])
+
+    def test_user_words(self) -> None:
+        cache = DictionaryCache(self.paths, max_bytes=0)
+        cache.add_word("en", "Paris")
+        cache.remove_word("en", "cat")
+        cache.get("de")
+        dictionary = cache.get("en")
+        self.assertIn("Paris", dictionary)
+        self.assertNotIn("cat", dictionary)
+        self.assertIn("hat", dictionary)
+        cache.remove_word("en", "Paris")
+        self.assertNotIn("Paris", cache.get("en"))
+
+    def test_keep_over_budget(self) -> None:
+        cache = DictionaryCache(self.paths, max_bytes=0)
+        cache.get("en")
+        cache.get("de")
+        self.assertEqual(cache.loaded, ["de"])
+
+    def test_disk_backend(self) -> None:
+        cache = DictionaryCache(self.paths, backend="disk")
+        cache_dir = Path(self.tempdir.name) / "cache"
+        with mock.patch("src.spellsp.dictionaries.CACHE_DIR", cache_dir):
+            dictionary = cache.get("he")
+        self.assertIn("חתול", dictionary)
+        self.assertNotIn("cat", dictionary)
+        dictionary.close()
+
+
+class TestCaseIndex(unittest.TestCase):
+    def test_casings(self) -> None:
+        index = CaseIndex({"polish", "Polish", "iPhone", ""})
+        self.assertEqual(sorted(index.casings("polish")), ["Polish", "polish"])
+        self.assertEqual(index.casings("iphone"), ("iPhone",))
+        self.assertEqual(index.casings("cat"), ())
+        self.assertEqual(set(index), {"polish", "Polish", "iPhone"})
+        self.assertEqual(len(index), 3)
+
+    def test_contains(self) -> None:
+        index = CaseIndex({"iPhone"})
+        self.assertIn("iPhone", index)
+        self.assertNotIn("iphone", index)
+
+    def test_add_discard(self) -> None:
+        index = CaseIndex({"polish"})
+        index.add("Polish")
+        index.add("Polish")
+        self.assertEqual(index.casings("polish"), ("polish", "Polish"))
+        index.discard("polish")
+        index.discard("Polish")
+        self.assertEqual(index.casings("polish"), ())
+        self.assertEqual(len(index), 0)
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_membership(self) -> None:
+        words = [f"word{i}".encode() for i in range(1000)]
+        bloom = BloomFilter.for_capacity(len(words), 0.01)
+        for word in words:
+            bloom.add(word)
+        self.assertTrue(all(word in bloom for word in words))
+        false_positives = sum(f"other{i}".encode() in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestDiskDictionary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tempdir.name) / "cache"
+        self.path = Path(self.tempdir.name) / "words.dic"
+        self.words = {
+            f"{word}{i}" for word in ("cat", "hat", "Ärger", "חתול") for i in range(50)
+        }
+        lines = [str(len(self.words)), *(f"{word}/S" for word in self.words)]
+        self.path.write_text("\n".join(lines))
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_lookup(self) -> None:
+        dictionary = DiskDictionary(self.path, self.cache_dir)
+        self.assertTrue(all(word in dictionary for word in self.words))
+        for word in ("cat", "cat50", "zzz", "", "Ärger", "a", "חתול500", "CAT1"):
+            self.assertNotIn(word, dictionary)
+        self.assertEqual(dictionary.casings("ärger1"), ("Ärger1",))
+        self.assertEqual(dictionary.casings("ärger"), ())
+        dictionary.close()
+
+    def test_reload(self) -> None:
+        DiskDictionary(self.path, self.cache_dir).close()
+        dictionary = DiskDictionary(self.path, self.cache_dir)
+        self.assertIn("hat7", dictionary)
+        self.assertEqual(dictionary.words, len(self.words) + 1)
+        dictionary.close()
+
+    def test_memory(self) -> None:
+        dictionary = DiskDictionary(self.path, self.cache_dir, cache_size=0)
+        actual = CaseIndex(make_wordset(self.path)).memory
+        self.assertLess(dictionary.memory, actual)
+        self.assertAlmostEqual(dictionary.set_size / actual, 1, delta=0.1)
+        dictionary.close()
+
+    def test_replaced_with_older_mtime(self) -> None:
+        DiskDictionary(self.path, self.cache_dir).close()
+        mtime = self.path.stat().st_mtime_ns
+        self.path.write_text("dog\n")
+        os.utime(self.path, ns=(mtime - 10**9, mtime - 10**9))
+        dictionary = DiskDictionary(self.path, self.cache_dir)
+        self.assertIn("dog", dictionary)
+        self.assertNotIn("hat7", dictionary)
+        dictionary.close()
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 2)
+
+    def test_memory_grows_with_cache(self) -> None:
+        dictionary = DiskDictionary(self.path, self.cache_dir)
+        empty = dictionary.memory
+        self.assertIn("hat7", dictionary)
+        self.assertGreater(dictionary.memory, empty)
+        dictionary.close()
+
+    def test_empty(self) -> None:
+        self.path.write_text("")
+        dictionary = DiskDictionary(self.path, self.cache_dir)
+        self.assertNotIn("cat", dictionary)
+        dictionary.close()
+
+
+def contains(dictionary: SharedDictionary, word: str) -> bool:
+    return word in dictionary
+
+
+class TestSharedDictionary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.words = {"cat", "hat", "Ärger", "חתול", "the"}
+        self.dictionary = SharedDictionary.create(self.words)
+
+    def tearDown(self) -> None:
+        self.dictionary.close()
+
+    def test_lookup(self) -> None:
+        self.assertTrue(all(word in self.dictionary for word in self.words))
+        for word in ("ca", "cats", "", "zzz", "A"):
+            self.assertNotIn(word, self.dictionary)
+
+    def test_casings(self) -> None:
+        dictionary = SharedDictionary.create(["polish", "Polish", "polishes"])
+        self.assertEqual(dictionary.casings("polish"), ("Polish", "polish"))
+        self.assertEqual(dictionary.casings("polishe"), ())
+        dictionary.close()
+
+    def test_attach(self) -> None:
+        attached = pickle.loads(pickle.dumps(self.dictionary))
+        self.assertEqual(attached.name, self.dictionary.name)
+        self.assertIn("hat", attached)
+        attached.close()
+        self.assertIn("hat", self.dictionary)
+
+    def test_workers(self) -> None:
+        words = ["cat", "dog", "חתול", "Hat"]
+        with multiprocessing.Pool(2) as pool:
+            found = pool.starmap(contains, [(self.dictionary, word) for word in words])
+        self.assertEqual(found, [True, False, True, False])
+
+    def test_offsets_little_endian(self) -> None:
+        dictionary = SharedDictionary.create(["cat"])
+        offsets = bytes(
+            dictionary._shm.buf[SHARED_HEADER.size : SHARED_HEADER.size + 16]
+        )
+        self.assertEqual(offsets, struct.pack("<QQ", 0, len(b"cat\tcat")))
+        dictionary.close()
+
+    def test_empty(self) -> None:
+        dictionary = SharedDictionary.create([])
+        self.assertNotIn("cat", dictionary)
+        dictionary.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,10 +10,12 @@ from src.spellsp.dispatch import (
     INIT_RESULT,
     initialize,
     shutdown,
-    publish_diagnostics,
     extract_doc,
     make_wordset,
+    dispatch,
 )
+from src.spellsp.dictionaries import DictionaryCache
+from src.spellsp.languages import LanguageSelector
 from src.spellsp.structures import (
     JsonrpcStream,
     PublishDiagnosticParams,
@@ -21,7 +23,7 @@ from src.spellsp.structures import (
     Range,
 )
 
-from .test_utils import make_msg, parse_msg
+from .test_utils import make_msg, parse_msg, parse_msgs
 
 
 class TestDispatch(unittest.TestCase):
@@ -101,9 +103,38 @@ class TestDispatch(unittest.TestCase):
         }
         self.assertEqual(parse_msg(self.outstream.read()), expected_error)
 
+    def run_session(
+        self,
+        messages: list[dict],
+        dictionaries: dict[str, str] = {"default": "the\ncat\nhat\nParis\n"},
+    ) -> list[dict]:
+        with tempfile.TemporaryDirectory() as d:
+            paths = {lang: Path(d) / f"{lang}.dic" for lang in dictionaries}
+            for lang, words in dictionaries.items():
+                paths[lang].write_text(words)
+            selector = LanguageSelector(DictionaryCache(paths))
+            session = [
+                {"id": 0, "method": "initialize", "params": {"capabilities": {}}},
+                {"method": "initialized", "params": {}},
+                *messages,
+                {"id": 99, "method": "shutdown"},
+                {"method": "exit"},
+            ]
+            self.instream.write("".join(make_msg(message) for message in session))
+            self.instream.seek(0)
+            with mock.patch.object(JsonrpcStream, "close"):
+                with self.assertRaises(SystemExit):
+                    dispatch(self.stream, selector)
+        self.outstream.seek(0)
+        return [
+            message["params"]
+            for message in parse_msgs(self.outstream.read())
+            if message.get("method") == "textDocument/publishDiagnostics"
+        ]
+
     def test_publish_diagnostics(self) -> None:
-        self.instream.write(
-            make_msg(
+        published = self.run_session(
+            [
                 {
                     "method": "textDocument/didOpen",
                     "params": {
@@ -115,51 +146,205 @@ class TestDispatch(unittest.TestCase):
                         }
                     },
                 }
-            )
+            ],
+            dictionaries={"default": "cat\nhat\n"},
         )
-        self.instream.seek(0)
-        self.stream.read_message()
-        publish_diagnostics(self.stream, {"cat", "hat"})
-        self.outstream.seek(0)
         expected_diagnostics = {
-            "jsonrpc": "2.0",
-            "method": "textDocument/publishDiagnostics",
-            "params": {
-                "uri": "testfile",
-                "version": 0,
-                "diagnostics": [
-                    {
-                        "range": {
-                            "start": {"line": 0, "character": 0},
-                            "end": {"line": 0, "character": 3},
-                        },
-                        "severity": 1,
-                        "message": "",
+            "uri": "testfile",
+            "version": 0,
+            "diagnostics": [
+                {
+                    "range": {
+                        "start": {"line": 0, "character": 0},
+                        "end": {"line": 0, "character": 3},
                     },
-                    {
-                        "range": {
-                            "start": {"line": 0, "character": 8},
-                            "end": {"line": 0, "character": 10},
-                        },
-                        "severity": 1,
-                        "message": "",
+                    "severity": 1,
+                    "message": "unknown word",
+                },
+                {
+                    "range": {
+                        "start": {"line": 0, "character": 8},
+                        "end": {"line": 0, "character": 10},
                     },
-                    {
-                        "range": {
-                            "start": {"line": 0, "character": 11},
-                            "end": {"line": 0, "character": 14},
-                        },
-                        "severity": 1,
-                        "message": "",
+                    "severity": 1,
+                    "message": "unknown word",
+                },
+                {
+                    "range": {
+                        "start": {"line": 0, "character": 11},
+                        "end": {"line": 0, "character": 14},
                     },
-                ],
-            },
+                    "severity": 1,
+                    "message": "unknown word",
+                },
+            ],
         }
         self.maxDiff = None
-        self.assertEqual(parse_msg(self.outstream.read()), expected_diagnostics)
+        self.assertEqual(published, [expected_diagnostics])
+
+    def test_publish_diagnostics_wrong_case(self) -> None:
+        published = self.run_session(
+            [
+                {
+                    "method": "textDocument/didOpen",
+                    "params": {
+                        "textDocument": {
+                            "uri": "testfile",
+                            "languageId": "text",
+                            "version": 0,
+                            "text": "paris",
+                        }
+                    },
+                }
+            ],
+            dictionaries={"default": "Paris\n"},
+        )
+        [diagnostic] = published[0]["diagnostics"]
+        self.assertEqual(diagnostic["message"], "wrong case; expected Paris")
+        self.assertEqual(diagnostic["severity"], 2)
 
+    def test_incremental_change(self) -> None:
+        published = self.run_session(
+            [
+                {
+                    "method": "textDocument/didOpen",
+                    "params": {
+                        "textDocument": {
+                            "uri": "testfile",
+                            "languageId": "text",
+                            "version": 0,
+                            "text": "the cat\nin the hat",
+                        }
+                    },
+                },
+                {
+                    "method": "textDocument/didChange",
+                    "params": {
+                        "textDocument": {"uri": "testfile", "version": 1},
+                        "contentChanges": [
+                            {
+                                "range": {
+                                    "start": {"line": 1, "character": 0},
+                                    "end": {"line": 1, "character": 3},
+                                },
+                                "text": "",
+                            }
+                        ],
+                    },
+                },
+            ]
+        )
+        self.assertEqual([params["version"] for params in published], [0, 1])
+        self.assertEqual(len(published[0]["diagnostics"]), 1)
+        self.assertEqual(published[1]["diagnostics"], [])
+
+    def test_detect_after_empty_open(self) -> None:
+        published = self.run_session(
+            [
+                {
+                    "method": "textDocument/didOpen",
+                    "params": {
+                        "textDocument": {
+                            "uri": "testfile",
+                            "languageId": "text",
+                            "version": 0,
+                            "text": "",
+                        }
+                    },
+                },
+                {
+                    "method": "textDocument/didChange",
+                    "params": {
+                        "textDocument": {"uri": "testfile", "version": 1},
+                        "contentChanges": [{"text": "i"}],
+                    },
+                },
+                {
+                    "method": "textDocument/didChange",
+                    "params": {
+                        "textDocument": {"uri": "testfile", "version": 2},
+                        "contentChanges": [{"text": "ich schreibe nicht"}],
+                    },
+                },
+            ],
+            dictionaries={
+                "en": "the\nthere\nthink\nwith\n",
+                "de": "ich\nschreibe\nnicht\nschon\n",
+            },
+        )
+        self.assertEqual(published[2]["diagnostics"], [])
+
+    def test_add_word(self) -> None:
+        published = self.run_session(
+            [
+                {
+                    "method": "textDocument/didOpen",
+                    "params": {
+                        "textDocument": {
+                            "uri": "testfile",
+                            "languageId": "text",
+                            "version": 0,
+                            "text": "the cat\nteh hat",
+                        }
+                    },
+                },
+                {
+                    "id": 1,
+                    "method": "workspace/executeCommand",
+                    "params": {"command": "spellsp.addWord", "arguments": ["teh"]},
+                },
+                {
+                    "id": 2,
+                    "method": "workspace/executeCommand",
+                    "params": {
+                        "command": "spellsp.removeWord",
+                        "arguments": ["cat", "testfile"],
+                    },
+                },
+                {
+                    "id": 3,
+                    "method": "workspace/executeCommand",
+                    "params": {"command": "spellsp.addWord", "arguments": ["dog"]},
+                },
+            ]
+        )
+        self.assertEqual(len(published), 3)
+        self.assertEqual(
+            [d["range"]["start"] for d in published[0]["diagnostics"]],
+            [{"line": 1, "character": 0}],
+        )
+        self.assertEqual(published[1]["diagnostics"], [])
+        self.assertEqual(
+            [d["range"]["start"] for d in published[2]["diagnostics"]],
+            [{"line": 0, "character": 4}],
+        )
+
+    def test_command_invalid_arguments(self) -> None:
+        self.run_session(
+            [
+                {
+                    "id": 1,
+                    "method": "workspace/executeCommand",
+                    "params": {"command": "spellsp.addWord", "arguments": [1]},
+                },
+                {
+                    "id": 2,
+                    "method": "workspace/executeCommand",
+                    "params": {
+                        "command": "spellsp.removeWord",
+                        "arguments": ["cat", ["testfile"]],
+                    },
+                },
+            ]
+        )
+        self.outstream.seek(0)
+        errors = {
+            message["id"]: message["error"]["code"]
+            for message in parse_msgs(self.outstream.read())
+            if "error" in message
+        }
+        self.assertEqual(errors, {1: -32602, 2: -32602})
 
-class TestAuxFuncs(unittest.TestCase):
     def test_extract_doc_opened(self) -> None:
         uri = "testfile"
         text = "the cat in the hat.\n"
@@ -0,0 +1,145 @@
+import random
+import unittest
+
+from src.spellsp.dictionaries import CaseIndex
+from src.spellsp.documents import Document, split_lines
+from src.spellsp.spellcheck import WRONG_CASE, find_misspellings
+from src.spellsp.structures import Range
+
+WORDS = ["the", "cat", "in", "hat", "Paris", "teh", "paris", "sat", ""]
+
+
+def random_text(rng: random.Random) -> str:
+    lines = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 5)))
+        for _ in range(rng.randint(0, 6))
+    ]
+    return "\n".join(lines)
+
+
+class TestDocument(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dictionary = CaseIndex({"the", "cat", "hat", "Paris", "sat"})
+
+    def test_split_lines(self) -> None:
+        self.assertEqual(split_lines("a\r\nb\rc\n"), ["a", "b", "c", ""])
+
+    def test_check(self) -> None:
+        document = Document("testfile", "the cat in\nthe hat", 0)
+        document.check(self.dictionary)
+        self.assertEqual(
+            document.misspellings(),
+            find_misspellings("the cat in\nthe hat", self.dictionary),
+        )
+
+    def test_positions(self) -> None:
+        document = Document("testfile", "the cat\nThe hat\n", 0)
+        self.assertEqual(
+            sorted(line.number for line in document.positions["the"]), [0, 1]
+        )
+        document.apply_change({"text": "the cat\nhat\n"})
+        self.assertEqual([line.number for line in document.positions["the"]], [0])
+
+    def test_incremental_change(self) -> None:
+        document = Document("testfile", "the cat\nin the\nhat", 0)
+        document.check(self.dictionary)
+        change = {
+            "range": {
+                "start": {"line": 0, "character": 4},
+                "end": {"line": 1, "character": 2},
+            },
+            "text": "paris\nsat\nteh",
+        }
+        lines = document.apply_change(change)
+        self.assertEqual([line.number for line in lines], [0, 1, 2])
+        document.check_lines(lines, self.dictionary)
+        self.assertEqual(document.text, "the paris\nsat\nteh the\nhat")
+        self.assertEqual(
+            document.misspellings(), find_misspellings(document.text, self.dictionary)
+        )
+
+    def test_utf16_positions(self) -> None:
+        document = Document("testfile", "a\U0001f600b cat", 0)
+        change = {
+            "range": {
+                "start": {"line": 0, "character": 5},
+                "end": {"line": 0, "character": 8},
+            },
+            "text": "teh",
+        }
+        document.check_lines(document.apply_change(change), self.dictionary)
+        self.assertEqual(document.text, "a\U0001f600b teh")
+        ranges = {
+            word: spell_range for spell_range, _, word, _ in document.misspellings()
+        }
+        self.assertEqual(ranges["b"], Range.from_word(0, 3, "b"))
+        self.assertEqual(ranges["teh"], Range.from_word(0, 5, "teh"))
+
+    def test_change_clamped_to_end(self) -> None:
+        document = Document("testfile", "the", 0)
+        change = {
+            "range": {
+                "start": {"line": 0, "character": 3},
+                "end": {"line": 1, "character": 0},
+            },
+            "text": " cat",
+        }
+        document.apply_change(change)
+        self.assertEqual(document.text, "the cat")
+        change["range"]["start"] = {"line": 0, "character": 100}
+        change["range"]["end"] = {"line": 0, "character": 100}
+        document.apply_change(change)
+        self.assertEqual(document.text, "the cat cat")
+
+    def test_full_change_splices_difference(self) -> None:
+        document = Document("testfile", "the\ncat\nin\nhat", 0)
+        lines = document.apply_change({"text": "the\ncat\nsat\non\nhat"})
+        self.assertEqual([line.text for line in lines], ["sat", "on"])
+        self.assertEqual([line.number for line in document.lines], [0, 1, 2, 3, 4])
+
+    def test_random_changes(self) -> None:
+        rng = random.Random(0)
+        document = Document("testfile", random_text(rng), 0)
+        document.check(self.dictionary)
+        for _ in range(200):
+            if rng.random() < 0.5:
+                lines = document.apply_change({"text": random_text(rng)})
+            else:
+                start = rng.randrange(len(document.lines))
+                end = rng.randrange(start, len(document.lines))
+                change = {
+                    "range": {
+                        "start": {
+                            "line": start,
+                            "character": rng.randint(
+                                0, len(document.lines[start].text)
+                            ),
+                        },
+                        "end": {
+                            "line": end,
+                            "character": len(document.lines[end].text),
+                        },
+                    },
+                    "text": random_text(rng),
+                }
+                lines = document.apply_change(change)
+            document.check_lines(lines, self.dictionary)
+            self.assertEqual(
+                document.misspellings(),
+                find_misspellings(document.text, self.dictionary),
+            )
+
+    def test_update_word(self) -> None:
+        document = Document("testfile", "paris teh\nthe teh", 0)
+        document.check(self.dictionary)
+        self.dictionary.add("teh")
+        self.assertTrue(document.update_word("teh", self.dictionary))
+        self.assertEqual(
+            document.misspellings(),
+            [(Range.from_word(0, 0, "paris"), WRONG_CASE, "paris", ("Paris",))],
+        )
+        self.assertFalse(document.update_word("dog", self.dictionary))
+
+
+if __name__ == "__main__":
+    unittest.main()
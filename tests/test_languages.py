@@ -0,0 +1,113 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.spellsp.structures import TextDocument
+from src.spellsp.dictionaries import DictionaryCache
+from src.spellsp.languages import (
+    LanguageSelector,
+    detect_language,
+    make_profile,
+    modeline_language,
+    sample_words,
+)
+
+ENGLISH = ["the", "there", "these", "think", "thing", "nothing", "with", "which"]
+GERMAN = ["der", "die", "das", "schon", "schreiben", "nicht", "ich", "sich"]
+HEBREW = ["שלום", "חתול", "כובע", "ספר", "ילדים", "בית"]
+
+
+class TestDetection(unittest.TestCase):
+    def test_modeline_vim(self) -> None:
+        text = "hello\n\n# vim: set spelllang=de:\n"
+        self.assertEqual(modeline_language(text), "de")
+
+    def test_modeline_spellsp(self) -> None:
+        text = "spellsp-lang: he\nhello\n"
+        self.assertEqual(modeline_language(text), "he")
+
+    def test_modeline_missing(self) -> None:
+        self.assertIsNone(modeline_language("the cat in the hat"))
+
+    def test_detect_language(self) -> None:
+        profiles = {
+            "en": make_profile(ENGLISH),
+            "de": make_profile(GERMAN),
+            "he": make_profile(HEBREW),
+        }
+        self.assertEqual(detect_language("I think these things", profiles), "en")
+        self.assertEqual(detect_language("ich schreibe nicht", profiles), "de")
+        self.assertEqual(detect_language("שלום ילדים בית", profiles), "he")
+        self.assertIsNone(detect_language("123 456", profiles))
+        self.assertIsNone(detect_language("ich schreibe", profiles))
+        self.assertIsNone(detect_language("qqq qqq qqq", profiles))
+
+    def test_sample_words(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            file = Path(d) / "file.dic"
+            file.write_text("3\ncat\nhat/S\nthe\n")
+            self.assertEqual(sample_words(file), ["cat", "hat", "the"])
+
+
+class TestLanguageSelector(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        d = Path(self.tempdir.name)
+        paths = {"en": d / "en.dic", "de": d / "de.dic", "he": d / "he.dic"}
+        for path, words in zip(paths.values(), (ENGLISH, GERMAN, HEBREW)):
+            path.write_text("\n".join(words) + "\n")
+        self.selector = LanguageSelector(
+            DictionaryCache(paths), patterns=[("*.de.txt", "de")]
+        )
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_configured(self) -> None:
+        doc = TextDocument("file:///notes.de.txt", "I think these things", 0)
+        self.assertEqual(self.selector.language(doc), "de")
+
+    def test_modeline(self) -> None:
+        doc = TextDocument("file:///notes.txt", "vim: spelllang=he\nthe", 0)
+        self.assertEqual(self.selector.language(doc), "he")
+
+    def test_detected(self) -> None:
+        doc = TextDocument("file:///notes.txt", "ich schreibe nicht", 0)
+        self.assertEqual(self.selector.language(doc), "de")
+        self.assertEqual(self.selector.dictionaries.loaded, [])
+        dictionary = self.selector.dictionaries.get(self.selector.language(doc))
+        self.assertEqual(set(dictionary), set(GERMAN))
+        self.assertEqual(self.selector.dictionaries.loaded, ["de"])
+
+    def test_fallback_not_remembered(self) -> None:
+        doc = TextDocument("file:///notes.txt", "", 0)
+        self.assertEqual(self.selector.language(doc), "en")
+        self.assertFalse(self.selector.detected(doc.uri))
+        doc = TextDocument("file:///notes.txt", "ich schreibe nicht", 1)
+        self.assertEqual(self.selector.language(doc), "de")
+        self.assertTrue(self.selector.detected(doc.uri))
+
+    def test_short_sample_not_remembered(self) -> None:
+        doc = TextDocument("file:///notes.txt", "D", 0)
+        self.assertEqual(self.selector.language(doc), "en")
+        self.assertFalse(self.selector.detected(doc.uri))
+        doc = TextDocument("file:///notes.txt", "die schreiben nicht", 1)
+        self.assertEqual(self.selector.language(doc), "de")
+
+    def test_no_match_uses_default(self) -> None:
+        selector = LanguageSelector(self.selector.dictionaries, default="de")
+        doc = TextDocument("file:///notes.txt", "qqq qqq qqq", 0)
+        self.assertEqual(selector.language(doc), "de")
+        self.assertFalse(selector.detected(doc.uri))
+
+    def test_remembered(self) -> None:
+        doc = TextDocument("file:///notes.txt", "ich schreibe nicht", 0)
+        self.selector.language(doc)
+        doc = TextDocument("file:///notes.txt", "I think these things", 1)
+        self.assertEqual(self.selector.language(doc), "de")
+        self.selector.forget(doc.uri)
+        self.assertEqual(self.selector.language(doc), "en")
+
+
+if __name__ == "__main__":
+    unittest.main()
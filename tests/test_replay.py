@@ -0,0 +1,100 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.spellsp.dispatch import dispatch
+from src.spellsp.dictionaries import DictionaryCache
+from src.spellsp.languages import LanguageSelector
+from src.spellsp.replay import RecordingStream, format_report, load_trace, replay
+
+from .test_utils import make_msg
+
+SESSION = [
+    {"id": 0, "method": "initialize", "params": {"capabilities": {}}},
+    {"method": "initialized", "params": {}},
+    {
+        "method": "textDocument/didOpen",
+        "params": {
+            "textDocument": {
+                "uri": "testfile",
+                "languageId": "text",
+                "version": 0,
+                "text": "the cat in the hat",
+            }
+        },
+    },
+    {
+        "method": "textDocument/didChange",
+        "params": {
+            "textDocument": {"uri": "testfile", "version": 1},
+            "contentChanges": [{"text": "the cat in the hat sat"}],
+        },
+    },
+    {"id": 1, "method": "shutdown"},
+    {"method": "exit"},
+]
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        d = Path(self.tempdir.name)
+        dictionary = d / "words.dic"
+        dictionary.write_text("cat\nhat\n")
+        self.selector = LanguageSelector(DictionaryCache({"default": dictionary}))
+        self.trace = d / "session.trace"
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def record(self, messages: list[dict]) -> None:
+        instream = io.StringIO("".join(make_msg(message) for message in messages))
+        stream = RecordingStream(instream, io.StringIO(), self.trace.open("w"))
+        with self.assertRaises(SystemExit):
+            dispatch(stream, self.selector)
+
+    def test_record(self) -> None:
+        self.record(SESSION)
+        with self.trace.open() as f:
+            messages = load_trace(f)
+        self.assertEqual([message for _, message in messages], SESSION)
+        times = [time for time, _ in messages]
+        self.assertEqual(times, sorted(times))
+
+    def test_replay(self) -> None:
+        self.record(SESSION)
+        with self.trace.open() as f:
+            stream, elapsed = replay(load_trace(f), self.selector)
+        self.assertEqual(
+            {method: len(latencies) for method, latencies in stream.latencies.items()},
+            {
+                "initialize": 1,
+                "initialized": 1,
+                "textDocument/didOpen": 1,
+                "textDocument/didChange": 1,
+                "shutdown": 1,
+                "exit": 1,
+            },
+        )
+        self.assertIn("6 messages", format_report(stream, elapsed))
+
+    def test_replay_truncated(self) -> None:
+        messages = [(0.0, message) for message in SESSION[:3]]
+        stream, _ = replay(messages, self.selector)
+        self.assertEqual(len(stream.latencies["exit"]), 1)
+
+    def test_replay_paced_offset(self) -> None:
+        # a trace cut from a long session starts well after time zero
+        messages = [(1000.0 + i * 0.01, message) for i, message in enumerate(SESSION)]
+        _, elapsed = replay(messages, self.selector, paced=True)
+        self.assertLess(elapsed, 1.0)
+
+    def test_replay_closes_on_exit(self) -> None:
+        messages = [(0.0, message) for message in SESSION[:2] + SESSION[-1:]]
+        stream, _ = replay(messages, self.selector)
+        self.assertTrue(stream._outstream.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
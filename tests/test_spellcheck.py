@@ -3,22 +3,28 @@ import unittest.mock as mock
 from dataclasses import dataclass
 
 from src.spellsp.structures import Range, Position
-from src.spellsp.spellcheck import check_spelling
+from src.spellsp.dictionaries import CaseIndex
+from src.spellsp.spellcheck import (
+    UNKNOWN_WORD,
+    WRONG_CASE,
+    check_spelling,
+    find_misspellings,
+)
 
 
 class TestSpellcheck(unittest.TestCase):
     def test_check_spelling_regular(self) -> None:
-        wordset = {"cat", "hat"}
+        index = CaseIndex({"cat", "hat"})
         sentence = "the cat in the hat"
         expected_ranges = [
             Range.from_word(0, 0, "the"),
             Range.from_word(0, 8, "in"),
             Range.from_word(0, 11, "the"),
         ]
-        self.assertEqual(check_spelling(sentence, wordset), expected_ranges)
+        self.assertEqual(check_spelling(sentence, index), expected_ranges)
 
     def test_check_spelling_proper_noun(self) -> None:
-        wordset = {"Cat", "Hat"}
+        index = CaseIndex({"Cat", "Hat"})
         sentence = "the cat in the Hat"
         expected_ranges = [
             Range.from_word(0, 0, "the"),
@@ -26,24 +32,44 @@ class TestSpellcheck(unittest.TestCase):
             Range.from_word(0, 8, "in"),
             Range.from_word(0, 11, "the"),
         ]
-        self.assertEqual(check_spelling(sentence, wordset), expected_ranges)
+        self.assertEqual(check_spelling(sentence, index), expected_ranges)
 
     def test_check_spelling_capitalized(self) -> None:
-        wordset = {"the", "cat", "hat"}
+        index = CaseIndex({"the", "cat", "hat"})
         sentence = "The cat in the hat"
         expected_ranges = [
             Range.from_word(0, 8, "in"),
         ]
-        self.assertEqual(check_spelling(sentence, wordset), expected_ranges)
+        self.assertEqual(check_spelling(sentence, index), expected_ranges)
 
     def test_check_spelling_capitalized_improperly(self) -> None:
-        wordset = {"the", "cat", "hat"}
+        index = CaseIndex({"the", "cat", "hat"})
         sentence = "tHe cat in the hat"
         expected_ranges = [
             Range.from_word(0, 0, "the"),
             Range.from_word(0, 8, "in"),
         ]
-        self.assertEqual(check_spelling(sentence, wordset), expected_ranges)
+        self.assertEqual(check_spelling(sentence, index), expected_ranges)
+
+    def test_check_spelling_all_caps(self) -> None:
+        index = CaseIndex({"the", "cat", "Paris", "iPhone"})
+        sentence = "THE CAT IPHONE PARIS"
+        self.assertEqual(check_spelling(sentence, index), [])
+
+    def test_check_spelling_folded(self) -> None:
+        index = CaseIndex({"Straße"})
+        sentence = "STRASSE Straße"
+        self.assertEqual(check_spelling(sentence, index), [])
+
+    def test_find_misspellings(self) -> None:
+        index = CaseIndex({"the", "Paris", "iPhone"})
+        sentence = "The paris Iphone teh"
+        expected = [
+            (Range.from_word(0, 4, "paris"), WRONG_CASE, "paris", ("Paris",)),
+            (Range.from_word(0, 10, "Iphone"), WRONG_CASE, "Iphone", ("iPhone",)),
+            (Range.from_word(0, 17, "teh"), UNKNOWN_WORD, "teh", ()),
+        ]
+        self.assertEqual(find_misspellings(sentence, index), expected)
 
 
 if __name__ == "__main__":
@@ -16,3 +16,14 @@ def parse_msg(message: str) -> dict[Any, Any]:
         if line.startswith("Content-Length: ")
     ]
     return json.loads(body[:content_length])
+
+
+def parse_msgs(stream: str) -> list[dict[Any, Any]]:
+    messages = []
+    decoder = json.JSONDecoder()
+    while stream:
+        _, stream = stream.split("\r\n\r\n", 1)
+        message, end = decoder.raw_decode(stream)
+        messages.append(message)
+        stream = stream[end:]
+    return messages